@@ -1,9 +1,9 @@
 #!/usr/bin/env python
 
-import re, os, sys, time, shlex, curses, shutil
-import argparse, subprocess, signal
+import re, os, sys, json, time, shlex, curses, shutil, hashlib
+import subprocess, signal, functools, select, stat, tempfile, pwd
 from pathlib import Path
-from datetime import datetime
+from collections import namedtuple
 
 # If running on the dumbest terminal on earth, fix env and reexec.
 if "TERM" in os.environ and os.environ["TERM"] == "xterm-kitty":
@@ -16,31 +16,178 @@ from bredos import curseapp as c
 
 c.APP_NAME = "BredOS System Configurator"
 LOG_FILE = None
+LOG_FP = None
 DRYRUN = False
 ROOT_MODE = False
+PACMAN_SYNCED = False
+ARCH = os.uname().machine
+
+FRAME_TIME = 1 / 60
+SYNC_ON = b"\x1b[?2026h"
+SYNC_OFF = b"\x1b[?2026l"
+TITLE_ATTR = curses.A_BOLD | curses.A_UNDERLINE
+ROOT_PARAM_RE = re.compile(r"\s*root=\S+")
 
 
 # ---------- CACHE FUNCTIONS ------------
 
-CACHE_FILE = f"/tmp/config_cache.{os.geteuid()}.json"
+
+def user_home() -> str:
+    # The euid's own home, sudo may keep the invoking user's HOME and
+    # XDG_CACHE_HOME, and root must not create its cache in there.
+    try:
+        return pwd.getpwuid(os.geteuid()).pw_dir
+    except KeyError:
+        return os.path.expanduser("~")
+
+
+CACHE_DIR = os.path.join(user_home(), ".cache", "bredos")
+CACHE_FILE = os.path.join(CACHE_DIR, "config_cache.json")
+DTBS_DIR = "/boot/dtbs"
+DT_CACHE = None
+DT_NAMES = {}
+
+
+def cache_dir_ok() -> bool:
+    # The cached trees end up in root commands, only trust a private dir we own.
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        st = os.lstat(CACHE_DIR)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.geteuid():
+            return False
+        if st.st_mode & 0o077:
+            os.chmod(CACHE_DIR, 0o700)
+    except OSError:
+        return False
+    return True
 
 
 def load_cache() -> dict:
+    if not cache_dir_ok():
+        return {}
     try:
-        with open(CACHE_FILE) as f:
-            return json.load(f)
-    except Exception as err:
+        fd = os.open(CACHE_FILE, os.O_RDONLY | os.O_NOFOLLOW)
+        with os.fdopen(fd) as f:
+            if os.fstat(fd).st_uid != os.geteuid():
+                return {}
+            cache = json.load(f)
+    except Exception:
         return {}
+    return cache if isinstance(cache, dict) else {}
 
 
 def write_cache(payload: dict) -> None:
+    if not cache_dir_ok():
+        return
+    try:
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, prefix=".config_cache.")
+    except OSError:
+        return
     try:
-        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
         with os.fdopen(fd, "w") as f:
             json.dump(payload, f)
-        os.rename(tmp, CACHE_FILE)
+        os.replace(tmp, CACHE_FILE)
     except:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def bredos_version() -> str:
+    # The cached layout is whatever this bredos build's dt.gencache() returns.
+    try:
+        from importlib.metadata import version
+
+        return version("bredos")
+    except Exception:
         pass
+    try:
+        return str(os.stat(dt.__file__).st_mtime_ns)
+    except Exception:
+        return ""
+
+
+def dtbs_fingerprint() -> str:
+    # Path, mtime and size of every tree, any package update changes it.
+    h = hashlib.sha256()
+    for root, dirs, files in os.walk(DTBS_DIR):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith((".dtb", ".dtbo")):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            h.update(f"{path}:{st.st_mtime_ns}:{st.st_size}\n".encode())
+    return h.hexdigest()
+
+
+def gencache() -> dict:
+    global DT_CACHE
+    if DT_CACHE is not None:
+        return DT_CACHE
+
+    # dt.gencache() runs dtc on every tree, reuse the last result if unchanged.
+    fingerprint = dtbs_fingerprint()
+    version = bredos_version()
+    cache = load_cache()
+    if (
+        cache.get("dtbs") == fingerprint
+        and cache.get("bredos") == version
+        and "dts" in cache
+    ):
+        DT_CACHE = cache["dts"]
+        return DT_CACHE
+
+    dts = dt.gencache()
+    cache["dtbs"] = fingerprint
+    cache["bredos"] = version
+    cache["dts"] = dts
+    write_cache(cache)
+    DT_CACHE = dts
+    return dts
+
+
+def dt_names(kind: str) -> dict:
+    # Normalized file name -> cache key, first match wins like match_filename.
+    if kind not in DT_NAMES:
+        ext = "dtb" if kind == "base" else "dtbo"
+        names = {}
+        for key in gencache()[kind]:
+            names.setdefault(normalize_filename(key, ext), key)
+        DT_NAMES[kind] = names
+    return DT_NAMES[kind]
+
+
+def drop_dt_cache() -> None:
+    global DT_CACHE
+    DT_CACHE = None
+    DT_NAMES.clear()
+
+
+# Snapshot of the enabled overlays, only set_overlays changes them.
+@functools.lru_cache(maxsize=None)
+def enabled_overlays() -> tuple:
+    return tuple(dt.identify_overlays())
+
+
+BootEnv = namedtuple("BootEnv", ["grub", "ext", "edk", "overridden", "efidir"])
+
+
+# Probed once, only our own config writes can change the result.
+@functools.lru_cache(maxsize=None)
+def bootenv() -> BootEnv:
+    grub = dt.grub_exists()
+    return BootEnv(
+        grub=grub,
+        ext=dt.extlinux_exists(),
+        edk=dt.booted_with_edk(),
+        overridden=grub and dt.uefi_overriden(),
+        efidir=dt.detect_efidir() if grub else None,
+    )
 
 
 # --------------- RUNNER ----------------
@@ -56,23 +203,34 @@ signal.signal(signal.SIGQUIT, handle_stupid)
 signal.signal(signal.SIGTSTP, handle_stupid)
 
 
+def sync_refresh(win, *args) -> None:
+    # DEC mode 2026 makes supporting terminals present the frame atomically.
+    os.write(sys.stdout.fileno(), SYNC_ON)
+    win.refresh(*args)
+    os.write(sys.stdout.fileno(), SYNC_OFF)
+
+
+def cmdr_dryrun(cmd: list, label: str = None) -> str:
+    output = f"DRYRUN: {' '.join(cmd)}"
+    if c.stdscr is None:
+        print(output)
+        return output
+
+    c.stdscr.erase()
+    c.stdscr.addstr(1, 2, label, TITLE_ATTR)
+    c.draw_border()
+    c.stdscr.addstr(3, 2, output)
+    c.stdscr.refresh()
+    return output
+
+
 def cmdr(cmd: list, elevate: bool = False, label: str = None) -> str:
-    output = []
     if DRYRUN:
-        if c.stdscr is not None:
-            c.stdscr.clear()
-            c.stdscr.addstr(1, 2, label, curses.A_BOLD | curses.A_UNDERLINE)
-            c.draw_border()
-        output = "DRYRUN: " + " ".join(cmd)
-        if c.stdscr is not None:
-            c.stdscr.addstr(3, 2, output)
-            c.stdscr.refresh()
-        else:
-            print(output)
-        return output
+        return cmdr_dryrun(cmd, label)
 
     proc_cm = None
-    if elevate and not ROOT_MODE:
+    elevated = elevate and not ROOT_MODE
+    if elevated:
         auth = False
         if not elevator.spawned:
             auth = True
@@ -88,7 +246,7 @@ def cmdr(cmd: list, elevate: bool = False, label: str = None) -> str:
                         1,
                         2,
                         "Authentication Failed!",
-                        curses.A_BOLD | curses.A_UNDERLINE,
+                        TITLE_ATTR,
                     )
                     c.resume()
                     c.draw_border()
@@ -97,51 +255,25 @@ def cmdr(cmd: list, elevate: bool = False, label: str = None) -> str:
                 return
         if auth and c.stdscr is not None:
             c.resume()
+    elif c.stdscr is None:
+        return cmdr_passthrough(cmd)
     else:
         proc_cm = subprocess.Popen(
             cmd,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            universal_newlines=True,
-            bufsize=1,
+            bufsize=0,
         )
 
     with proc_cm as proc:
         try:
-            y = 3
-            ym = 0
-            xm = None
-            limit = 0
-            if c.stdscr is not None:
-                c.stdscr.clear()
-                c.stdscr.addstr(1, 2, label, curses.A_BOLD | curses.A_UNDERLINE)
-                c.draw_border()
-                ym, xm = c.stdscr.getmaxyx()
-                limit = int(ym) - 2
-                c.stdscr.refresh()
-            clines = []
-            eoc = False
-            for uline in proc.stdout:
-                clines = [uline] if c.stdscr is None else c.lw([uline], xm)
-                for line in clines:
-                    if "[[EOC]]" in line:
-                        eoc = True
-                        break
-                    if c.stdscr is not None:
-                        if y < limit:
-                            c.stdscr.addstr(y if y <= limit else limit, 2, line)
-                        else:
-                            for i in range(3, limit):
-                                c.clear_line(i)
-                                c.stdscr.addstr(i, 2, output[y - limit - 3 + i][:-1])
-                        y += 1
-                        c.draw_border()
-                        c.stdscr.refresh()
-                    else:
-                        print(line, end="")
-                    output.append(line)
-                if eoc:
-                    break
+            if c.stdscr is None:
+                output = cmdr_cli(proc)
+            elif elevated:
+                output = cmdr_tui(proc, ([line] for line in proc.stdout), label)
+            else:
+                output = cmdr_tui(proc, pipe_lines(proc.stdout.fileno()), label)
             proc.wait()
         except KeyboardInterrupt:
             try:
@@ -149,32 +281,178 @@ def cmdr(cmd: list, elevate: bool = False, label: str = None) -> str:
             except:
                 pass
             return -1
-    returncode = proc.returncode
+    return output
+
+
+def cmdr_cli(proc) -> str:
+    # Only elevated commands get here, the shell stays alive past [[EOC]].
+    output = []
+    # Buffer while more output is already waiting, flush once it drains.
+    line_buffering = sys.stdout.line_buffering
+    sys.stdout.reconfigure(line_buffering=False)
+    try:
+        for line in proc.stdout:
+            if "[[EOC]]" in line:
+                break
+            sys.stdout.write(line)
+            output.append(line)
+            if not select.select([proc.stdout], [], [], 0)[0]:
+                sys.stdout.flush()
+    finally:
+        sys.stdout.flush()
+        sys.stdout.reconfigure(line_buffering=line_buffering)
+    return "".join(output)
+
+
+def cmdr_tui(proc, batches, label: str) -> str:
+    c.stdscr.erase()
+    c.stdscr.addstr(1, 2, label, TITLE_ATTR)
+    c.draw_border()
+    ym, xm = c.stdscr.getmaxyx()
+    limit = int(ym) - 2
+    c.stdscr.refresh()
+
+    # Output area, scrolled by curses instead of repainted per line.
+    # A terminal too small to hold it still runs the command, just unseen.
+    rows = limit - 3
+    pad = None
+    if rows > 0 and xm > 4:
+        pad = curses.newpad(rows, xm - 3)
+        pad.bkgd(c.stdscr.getbkgd())
+        pad.scrollok(True)
+
+    output = []
+    y = 0
+    last_refresh = 0.0
+    eoc = False
+    for batch in batches:
+        for uline in batch:
+            for line in c.lw([uline], xm):
+                if "[[EOC]]" in line:
+                    eoc = True
+                    break
+                output.append(line)
+                if pad is None:
+                    continue
+                text = line.rstrip("\n")[: xm - 4]
+                if y < rows:
+                    pad.addstr(y, 0, text)
+                else:
+                    pad.scroll(1)
+                    pad.addstr(rows - 1, 0, text)
+                y += 1
+            if eoc:
+                break
+        if eoc:
+            break
+        if pad is None:
+            continue
+        # Cap at 60fps, but refresh right away if no output is queued.
+        now = time.monotonic()
+        if (
+            now - last_refresh >= FRAME_TIME
+            or not select.select([proc.stdout], [], [], 0)[0]
+        ):
+            sync_refresh(pad, 0, 0, 3, 2, limit - 1, xm - 2)
+            last_refresh = now
+
+    if pad is not None:
+        sync_refresh(pad, 0, 0, 3, 2, limit - 1, xm - 2)
     return "".join(output)
 
 
-def cli_runner(cmd: str, elevate: bool = False) -> None:
+def split_lines(text: str) -> list:
+    # Translate newlines like universal_newlines did, every line ends in "\n".
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    if not lines[-1]:
+        lines.pop()
+    return [line + "\n" for line in lines]
+
+
+def pipe_lines(fd: int):
+    # Read the pipe in large chunks and decode each batch of complete lines
+    # at once. A bare "\r" ends a line too, so progress output is not held.
+    buf = b""
+    cr = False
+    while chunk := os.read(fd, 65536):
+        # The "\r" of a "\r\n" split across reads already ended the line.
+        if cr and chunk.startswith(b"\n"):
+            chunk = chunk[1:]
+        buf += chunk
+        end = max(buf.rfind(b"\n"), buf.rfind(b"\r")) + 1
+        cr = False
+        if not end:
+            continue
+        cr = end == len(buf) and buf.endswith(b"\r")
+        text = buf[:end].decode(errors="replace")
+        buf = buf[end:]
+        yield split_lines(text)
+    if buf:
+        yield split_lines(buf.decode(errors="replace"))
+
+
+def cmdr_passthrough(cmd: list) -> str:
+    sys.stdout.flush()
+    if LOG_FILE is None:
+        # Nothing to capture, let the command own the terminal directly.
+        try:
+            subprocess.run(cmd, stdin=subprocess.DEVNULL)
+        except KeyboardInterrupt:
+            return -1
+        return ""
+    # No TUI to render lines into, forward the raw output in large chunks.
+    output = bytearray()
+    with subprocess.Popen(
+        cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+    ) as proc:
+        try:
+            fd = proc.stdout.fileno()
+            while chunk := os.read(fd, 65536):
+                sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
+                output += chunk
+            proc.wait()
+        except KeyboardInterrupt:
+            try:
+                proc.kill()
+            except:
+                pass
+            return -1
+    return output.decode(errors="replace")
+
+
+def log_command(cmd: list, output: str) -> None:
+    # Opened on first use and kept open for the rest of the session.
+    global LOG_FP
+    if LOG_FILE is None:
+        return
+    if LOG_FP is None:
+        LOG_FP = open(LOG_FILE, "a")
+    LOG_FP.write(f"$ {' '.join(cmd)}\n{output}\n")
+    LOG_FP.flush()
+
+
+def cli_runner(cmd: str, elevate: bool = False) -> str:
     global LOG_FILE, ROOT_MODE
 
     result = cmdr(cmd, elevate)
 
-    if LOG_FILE is not None and result != -1:
-        with open(LOG_FILE, "a") as f:
-            f.write(f"$ {' '.join(cmd)}\n")
-            f.write(result.stdout + "\n")
+    if result != -1:
+        log_command(cmd, result)
 
     if result == -1:
         print("\nABORTED")
+    return result
 
 
 def tui_runner(
     label: str, cmd: list, elevate: bool = False, prompt: bool = True
-) -> None:
+) -> str:
     global LOG_FILE, ROOT_MODE
 
-    c.stdscr.clear()
+    c.stdscr.erase()
     c.draw_border()
-    c.stdscr.addstr(1, 2, label, curses.A_BOLD | curses.A_UNDERLINE)
+    c.stdscr.addstr(1, 2, label, TITLE_ATTR)
     # c.stdscr.addstr(
     #     4,
     #     2,
@@ -184,72 +462,138 @@ def tui_runner(
 
     output = cmdr(cmd, elevate, label)
 
-    if LOG_FILE is not None and output != -1:
-        with open(LOG_FILE, "a") as f:
-            f.write(f"$ {' '.join(cmd)}\n{output}\n")
+    if output != -1:
+        log_command(cmd, output)
 
     maxy, _ = c.stdscr.getmaxyx()
 
     if not prompt:
         if DRYRUN:
             time.sleep(3)
-        return
+        return output
 
     c.stdscr.attron(curses.A_REVERSE)
     c.stdscr.addstr(
         maxy - 2,
         2,
-        " " + ("ABORTED" if output == -1 else "OK") + " - Press Enter to return ",
+        f" {'ABORTED' if output == -1 else 'OK'} - Press Enter to return ",
     )
     c.stdscr.attroff(curses.A_REVERSE)
     c.stdscr.refresh()
-    while c.stdscr.getch() != ord("\n"):
-        pass
-    c.wait_clear()
+    # Drop keys pressed while the command was running, then block on stdin
+    # instead of switching the window's delay mode, which curses cannot report
+    # back to us for a later restore.
+    curses.flushinp()
+    while True:
+        select.select([sys.stdin], [], [])
+        if c.stdscr.getch() == ord("\n"):
+            break
+    return output
 
 
 def runner(
     cmd: list, elevate=True, label: str = c.APP_NAME, prompt: bool = True
-) -> None:
+) -> str:
+    # None if authentication failed, -1 if interrupted, else the output.
     if c.stdscr is None:
-        cli_runner(cmd, elevate=elevate)
-    else:
-        tui_runner(label, cmd, elevate=elevate, prompt=prompt)
+        return cli_runner(cmd, elevate=elevate)
+    return tui_runner(label, cmd, elevate=elevate, prompt=prompt)
 
 
 def mrunner(
     cmds: list, elevate=True, label: str = c.APP_NAME, prompt: bool = True
+) -> str:
+    if not cmds:
+        return ""
+    if len(cmds) == 1:
+        return runner(cmds[0], elevate, label, prompt)
+    cmd = " && ".join(shlex.join(a) for a in cmds)
+    return runner(["sh", "-c", cmd], elevate, label, prompt)
+
+
+def elevated_file_write(
+    filepath: str, content: str, then: list = None, label: str = None
 ) -> None:
-    cmd = " && ".join(" ".join(b.replace("'", "\\'") for b in a) for a in cmds)
-    runner(["sh", "-c", cmd], elevate, label, prompt)
-
-
-def elevated_file_write(filepath: str, content: str) -> None:
-    escaped_lines = [
-        '"'
-        + line.replace("\\", "\\\\")
-        .replace('"', '\\"')
-        .replace("$", "\\$")
-        .replace("`", "\\`")
-        + '"'
-        for line in content.splitlines()
-    ]
+    # The elevator takes one line per command, so the content goes in as
+    # quoted printf arguments, one per line, never as a here-doc or on stdin.
+    lines = content.splitlines()
+    write = shlex.join(["printf", "%s\\n", *lines]) if lines else "printf ''"
+
+    # Write a fresh temp file next to the real target and rename over it, so
+    # it is never half-written, a symlinked config stays a symlink and the new
+    # file keeps the old mode and owner (mktemp itself creates 0600 files).
+    target = os.path.realpath(filepath)
+    dst = shlex.quote(target)
+    template = shlex.quote(
+        os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.XXXXXX")
+    )
+    full_cmd = (
+        f'tmp=$(mktemp {template}) && {{ {write} > "$tmp"'
+        f" && if [ -e {dst} ]; then"
+        f' chmod --reference={dst} "$tmp" && chown --reference={dst} "$tmp";'
+        f' else chmod 644 "$tmp"; fi'
+        f' && mv -f "$tmp" {dst} || {{ rm -f "$tmp"; false; }}; }}'
+    )
+    if then is not None:
+        # Chain the follow-up command, so both run under one elevated shell.
+        full_cmd += f" && {shlex.join(then)}"
+
+    if then is None:
+        runner(["sh", "-c", full_cmd], True, f"Writing {filepath}", False)
+    else:
+        runner(["sh", "-c", full_cmd], True, label)
+
+
+# Files regenerated from each config by its update command.
+GENERATED_CONFIGS = {
+    "/etc/default/grub": "/boot/grub/grub.cfg",
+    "/etc/default/u-boot": "/boot/extlinux/extlinux.conf",
+}
+
+
+def config_unchanged(filepath: str, content: str) -> bool:
+    try:
+        with open(filepath) as f:
+            if f.read().splitlines() != content.splitlines():
+                return False
+        generated = GENERATED_CONFIGS.get(filepath)
+        return generated is None or (
+            os.path.getmtime(generated) >= os.path.getmtime(filepath)
+        )
+    except OSError:
+        return False
 
-    printf_part = 'printf "%s\\n" ' + " ".join(escaped_lines)
-    full_cmd = f'{printf_part} | tee "{filepath}" > /dev/null'
 
-    runner(["sh", "-c", full_cmd], True, f"Writing {filepath}", False)
+def update_config(
+    filepath: str, content: str, name: str, cmd: list, label: str
+) -> None:
+    if config_unchanged(filepath, content):
+        c.message([f"The {name} config is already up to date."], label)
+        return
+
+    if not DRYRUN:
+        elevated_file_write(filepath, content, cmd, label)
+        bootenv.cache_clear()
+        return
+
+    c.message(
+        [
+            f"The {name} config would have been updated with the following:",
+            "",
+            content,
+        ],
+        "DRYRUN Simulated Output",
+    )
+    runner(cmd, True, label)
 
 
 def debug_info() -> None:
-    grub = dt.grub_exists()
-    ext = dt.extlinux_exists()
-    efi = dt.booted_with_edk()
+    env = bootenv()
     c.message(
         [
-            f"GRUB: {grub}",
-            f"EXTLINUX: {ext}",
-            f"EFI: {efi}",
+            f"GRUB: {env.grub}",
+            f"EXTLINUX: {env.ext}",
+            f"EFI: {env.edk}",
             f"Elevated: {elevator.spawned}",
             f"DryRun: {DRYRUN}",
         ],
@@ -263,45 +607,44 @@ def debug_info() -> None:
 
 
 def normalize_filename(filename: str, extension: str) -> str:
-    base = os.path.basename(filename)
-    name, ext = os.path.splitext(base)
+    name = filename.rpartition("/")[2].rsplit(".", 1)[0]
     return f"{name}.{extension}"
 
 
+def list_files(path: str) -> list:
+    # A missing directory simply has nothing to list, like rm on an empty glob.
+    try:
+        with os.scandir(path) as it:
+            return [entry.path for entry in it if entry.is_file()]
+    except FileNotFoundError:
+        return []
+
+
+def tree_name(path) -> str:
+    return os.path.splitext(os.path.basename(str(path)))[0]
+
+
 def set_base_dtb(dtb: str = None) -> None:
-    grub = dt.grub_exists()
-    ext = dt.extlinux_exists()
+    env = bootenv()
     normalized_dtb = None
     matched_dtb = None
-    dtb_cache = dt.gencache()
 
     if dtb is not None:
-        bases = []
-        for i in list(dtb_cache["base"].keys()):
-            bases.append(normalize_filename(i, "dtb"))
-
         normalized_dtb = normalize_filename(dtb, "dtb")
-
-        if (normalized_dtb is None) or (normalized_dtb not in bases):
+        matched_dtb = dt_names("base").get(normalized_dtb)
+        if matched_dtb is None:
             c.message(
                 [f'DTB "{dtb}" not found on system, refusing to continue.'], "ERROR"
             )
             return
-
-        matched_dtb = utilities.match_filename(
-            normalized_dtb, list(dtb_cache["base"].keys())
-        )
-        if matched_dtb is None:
-            c.message(["Failed to match DTB!"], "ERROR")
-            return
     else:
         c.message("Refusing to unset Base DTB!", "ERROR")
         return
 
-    if grub:
+    if env.grub:
         grubcfg = dt.parse_grub()
 
-        if not dt.uefi_overriden():
+        if not env.overridden:
             grubdtbn = matched_dtb
             if grubdtbn.startswith("/boot/"):
                 grubdtbn = grubdtbn[6:]
@@ -309,33 +652,22 @@ def set_base_dtb(dtb: str = None) -> None:
 
             grubcfg = dt.encode_grub(grubcfg)
 
-            if not DRYRUN:
-                elevated_file_write("/etc/default/grub", grubcfg)
-            else:
-                c.message(
-                    [
-                        "The GRUB config would have been updated with the following:",
-                        "",
-                        grubcfg,
-                    ],
-                    "DRYRUN Simulated Output",
-                )
-
-            runner(
+            update_config(
+                "/etc/default/grub",
+                grubcfg,
+                "GRUB",
                 ["grub-mkconfig", "-o", "/boot/grub/grub.cfg"],
-                True,
                 "Update GRUB Configuration",
             )
         else:
             # Remove all old Base DTBs
-            efidir = dt.detect_efidir()
-            listing = utilities.ls(efidir + "/dtb/base/")
-            listing_str = " ".join(str(p) for p in listing)
+            efidir = env.efidir
+            listing = list_files(efidir + "/dtb/base/")
 
-            cmds = [
-                ["rm", "-v", listing_str],
-                ["cp", "-v", matched_dtb, efidir + "/dtb/base/"],
-            ]
+            cmds = []
+            if listing:
+                cmds.append(["rm", "-v", *listing])
+            cmds.append(["cp", "-v", matched_dtb, efidir + "/dtb/base/"])
 
             # Changes here must also be performed down in set_overlays
             if normalized_dtb == "rk3588s-fydetab-duo.dtb":
@@ -360,81 +692,52 @@ def set_base_dtb(dtb: str = None) -> None:
                 cmds.append(
                     ["cp", "-v", matched_dtb, efidir + "/dtb/base/rk3588-rock-5bp.dtb"]
                 )
-            cmds.append(["sync", efidir])
+            cmds.append(["sync", "-f", efidir])
             mrunner(cmds, True, "Performing Changes")
 
-    if ext:
+    if env.ext:
         extcfg = dt.parse_uboot()
 
         extcfg["U_BOOT_FDT"] = normalized_dtb
 
         extcfg = dt.encode_uboot(extcfg)
 
-        if not DRYRUN:
-            elevated_file_write("/etc/default/u-boot", extcfg)
-        else:
-            c.message(
-                [
-                    "The u-boot config would have been updated with the following:",
-                    "",
-                    extcfg,
-                ],
-                "DRYRUN Simulated Output",
-            )
-
-        runner(
+        update_config(
+            "/etc/default/u-boot",
+            extcfg,
+            "u-boot",
             ["u-boot-update"],
-            True,
             "Trigger U-Boot Update",
         )
 
 
 def set_overlays(dtbos: list = []) -> None:
-    grub = dt.grub_exists()
-    ext = dt.extlinux_exists()
+    env = bootenv()
 
-    normalized_dtbos = set()
+    normalized_dtbos = [normalize_filename(i, "dtbo") for i in dtbos]
     matched_dtbos = set()
-    dtb_cache = dt.gencache()
 
     if dtbos:
-        overlays = []
-
-        # Populate overlays cache with trimmed names
-        for i in list(dtb_cache["overlays"].keys()):
-            overlays.append(normalize_filename(i, "dtbo"))
-
-        # Format inputted dtbos
-        for i in dtbos:
-            normalized_dtbos.add(normalize_filename(i, "dtbo"))
+        overlays = dt_names("overlays")
 
         # Ensure they all exist
-        for i in normalized_dtbos:
-            if (i is None) or i not in overlays:
-                c.message(
-                    [f'Overlay "{i}" not found on system, refusing to continue.'],
-                    "ERROR",
-                )
-                return
-
-        # Match inputted dtbos
-        for i in normalized_dtbos:
-            matched_dtbos.add(
-                utilities.match_filename(i, list(dtb_cache["overlays"].keys()))
+        missing = [i for i in normalized_dtbos if i not in overlays]
+        if missing:
+            c.message(
+                [
+                    f'Overlay "{i}" not found on system, refusing to continue.'
+                    for i in missing
+                ],
+                "ERROR",
             )
+            return
 
-        # Ensure they all exist
-        for i in matched_dtbos:
-            if i is None:
-                c.message(
-                    [f'Overlay "{i}" failed to match, refusing to continue.'], "ERROR"
-                )
-                return
+        matched_dtbos = {overlays[i] for i in normalized_dtbos}
 
-    if grub:
-        efidir = dt.detect_efidir()
+    if env.grub:
+        efidir = env.efidir
 
-        if not dt.uefi_overriden():
+        if not env.overridden:
             if c.confirm(
                 [
                     "IMPORTANT NOTICE --!!-- IMPORTART NOTICE",
@@ -466,9 +769,7 @@ def set_overlays(dtbos: list = []) -> None:
 
                 # Fetch original base DTB
                 base_dtb_normalized = normalize_filename(grubcfg["GRUB_DTB"], "dtb")
-                base_dtb_path = utilities.match_filename(
-                    base_dtb_normalized, list(dtb_cache["base"].keys())
-                )
+                base_dtb_path = dt_names("base").get(base_dtb_normalized)
                 if base_dtb_path is None:
                     c.message(["Failed to match DTB!"], "ERROR")
                     return
@@ -506,7 +807,7 @@ def set_overlays(dtbos: list = []) -> None:
                             efidir + "/dtb/base/itx-3588j.dtb",
                         ]
                     )
-                cmds.append(["sync", efidir])
+                cmds.append(["sync", "-f", efidir])
 
                 mrunner(cmds, True, "Performing Changes", False)
 
@@ -514,21 +815,11 @@ def set_overlays(dtbos: list = []) -> None:
                 del grubcfg["GRUB_DTB"]
                 grubcfg = dt.encode_grub(grubcfg)
 
-                if not DRYRUN:
-                    elevated_file_write("/etc/default/grub", grubcfg)
-                else:
-                    c.message(
-                        [
-                            "The GRUB config would have been updated with the following:",
-                            "",
-                            grubcfg,
-                        ],
-                        "DRYRUN Simulated Output",
-                    )
-
-                runner(
+                update_config(
+                    "/etc/default/grub",
+                    grubcfg,
+                    "GRUB",
                     ["grub-mkconfig", "-o", "/boot/grub/grub.cfg"],
-                    True,
                     "Update GRUB Configuration",
                 )
             else:
@@ -537,65 +828,235 @@ def set_overlays(dtbos: list = []) -> None:
 
         # Remove all current DTBOs
         listing = []
-        listing_str = ""
         try:
-            listing = utilities.ls(efidir + "/dtb/overlays/")
-            listing_str = " ".join(str(p) for p in listing)
+            listing = list_files(efidir + "/dtb/overlays/")
         except Exception as err:
             if not DRYRUN:
                 raise err
 
-        if listing_str:
-            cmds = [["rm", "-v", listing_str]]
+        cmds = []
+        if listing:
+            cmds.append(["rm", "-v", *listing])
 
-        for dtbo in matched_dtbos:
-            cmds.append(["cp", "-v", dtbo, efidir + "/dtb/overlays/"])
+        if matched_dtbos:
+            cmds.append(
+                ["cp", "-vt", efidir + "/dtb/overlays/", *sorted(matched_dtbos)]
+            )
+        cmds.append(["sync", "-f", efidir])
 
         mrunner(cmds, True, "Updating Overlays")
 
-    if ext:
+    if env.ext:
         extcfg = dt.parse_uboot()
 
         if dtbos:
-            for i in range(len(dtbos)):
-                dtbos[i] = normalize_filename(dtbos[i], "dtbo")
-                dtbo_path = utilities.match_filename(
-                    dtbos[i], list(dtb_cache["overlays"].keys())
-                )
-                if dtbo_path is None:
-                    c.message(
-                        [
-                            f'Overlay "{dtbos[i]}" not found on system, refusing to continue.'
-                        ],
-                        "ERROR",
-                    )
-                    return
-
-            extcfg["U_BOOT_FDT_OVERLAYS"] = " ".join(dtbos)
+            extcfg["U_BOOT_FDT_OVERLAYS"] = " ".join(normalized_dtbos)
         else:
-            if "U_BOOT_FDT_OVERLAYS" in extcfg.keys():
+            if "U_BOOT_FDT_OVERLAYS" in extcfg:
                 del extcfg["U_BOOT_FDT_OVERLAYS"]
 
         extcfg = dt.encode_uboot(extcfg)
 
-        if not DRYRUN:
-            elevated_file_write("/etc/default/u-boot", extcfg)
-        else:
-            c.message(
-                [
-                    "The u-boot config would have been updated with the following:",
-                    "",
-                    extcfg,
-                ],
-                "DRYRUN Simulated Output",
-            )
-
-        runner(
+        update_config(
+            "/etc/default/u-boot",
+            extcfg,
+            "u-boot",
             ["u-boot-update"],
-            True,
             "Trigger U-Boot Update",
         )
 
+    enabled_overlays.cache_clear()
+
+
+# ------------ PACKAGE SETS -------------
+
+RECOMMENDS_PKGS = (
+    "legcord-bin",
+    "ayugram-desktop",
+    "thunderbird",
+    "gnome-disk-utility",
+    "mpv",
+    "libreoffice-fresh",
+    "timeshift",
+    "proton-run",
+    "evince",
+    "loupe",
+)
+
+DOCKER_PKGS = ("docker", "docker-buildx", "docker-compose", "pigz", "criu")
+
+DOCKER_POST = (
+    ["systemctl", "mask", "--now", "systemd-networkd-wait-online"],
+    ["systemctl", "enable", "--now", "docker"],
+)
+
+DEVELOPMENT_PKGS = (
+    "python-prettytable",
+    "grub",
+    "parted",
+    "gptfdisk",
+    "edk2-rk3588-devel",
+    "dtc",
+    "xmlto",
+    "docbook-xsl",
+    "kmod",
+    "bc",
+    "uboot-tools",
+    "bredos-tools",
+)
+
+GNOME_PKGS = (
+    "gnome-app-list",
+    "gnome-autoar",
+    "gnome-backgrounds",
+    "gnome-bluetooth-3.0",
+    "gnome-calculator",
+    "gnome-characters",
+    "gnome-clocks",
+    "gnome-color-manager",
+    "gnome-control-center",
+    "gnome-desktop",
+    "gnome-desktop-4",
+    "gnome-desktop-common",
+    "gnome-disk-utility",
+    "gnome-keybindings",
+    "gnome-keyring",
+    "gnome-menus",
+    "gnome-online-accounts",
+    "gnome-power-manager",
+    "gnome-session",
+    "gnome-settings-daemon",
+    "gnome-shell",
+    "gnome-shell-extensions",
+    "gnome-system-monitor",
+    "gnome-themes-extra",
+    "gnome-tweaks",
+    "gnome-user-share",
+    "gnome-weather",
+    "polkit-gnome",
+    "xdg-desktop-portal-gnome",
+    "extension-manager",
+    "evince",
+    "caribou",
+    "nautilus",
+    "nautilus-python",
+    "libnautilus-extension",
+    "gdm",
+)
+
+
+PACMAN_LOCK = "/var/lib/pacman/db.lck"
+# libalpm dates the sync dbs with the mirror's Last-Modified, so we keep our
+# own record of when a refresh last went through.
+PACMAN_SYNC_STAMP = os.path.join(CACHE_DIR, "pacman_synced")
+PACMAN_SYNC_MAX_AGE = 600
+
+
+def pacman_running() -> bool:
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/comm") as f:
+                if f.read().strip() == "pacman":
+                    return True
+        except OSError:
+            pass
+    return False
+
+
+def wait_pacman_lock(timeout: int = 300) -> bool:
+    # Another transaction may legitimately hold the lock, wait for it to finish.
+    if not os.path.exists(PACMAN_LOCK):
+        return True
+    # A lock with no pacman behind it is stale, waiting will not clear it.
+    if not pacman_running():
+        return not os.path.exists(PACMAN_LOCK)
+
+    c.message(
+        ["Another package manager operation is running.", "", "Waiting.."],
+        "Pacman Database Locked",
+        False,
+    )
+    deadline = time.monotonic() + timeout
+    try:
+        while os.path.exists(PACMAN_LOCK):
+            if time.monotonic() > deadline:
+                return False
+            if not pacman_running():
+                return not os.path.exists(PACMAN_LOCK)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        return False
+    return True
+
+
+def confirm_install(
+    pkgs: list, title: str, intro: str = "This will install the following packages:"
+) -> bool:
+    return c.confirm(
+        [intro, ""]
+        + [f" - {pkg}" for pkg in pkgs]
+        + ["", "Are you sure you wish to continue?"],
+        title,
+    )
+
+
+def pacman_dbs_fresh() -> bool:
+    try:
+        st = os.lstat(PACMAN_SYNC_STAMP)
+    except OSError:
+        return False
+    if st.st_uid != os.geteuid():
+        return False
+    return 0 <= time.time() - st.st_mtime < PACMAN_SYNC_MAX_AGE
+
+
+def mark_pacman_synced() -> None:
+    global PACMAN_SYNCED
+    PACMAN_SYNCED = True
+    if not cache_dir_ok():
+        return
+    try:
+        Path(PACMAN_SYNC_STAMP).touch()
+    except OSError:
+        pass
+
+
+def pacman_install(
+    pkgs: list, label: str, post: list = [], prompt: bool = True
+) -> None:
+    if not DRYRUN and not wait_pacman_lock():
+        c.message(
+            [
+                "The pacman database is still locked.",
+                "",
+                'If no package manager is running, use "Unlock Pacman Database".',
+            ],
+            "Pacman Database Locked",
+        )
+        return
+
+    # A single database refresh is enough for the whole session,
+    # and none at all if the databases were refreshed recently.
+    op = "-S" if PACMAN_SYNCED or pacman_dbs_fresh() else "-Sy"
+    result = mrunner(
+        [["pacman", op, "--noconfirm", "--needed", *pkgs], *post], True, label, prompt
+    )
+    # A kernel package may have shipped new device trees.
+    drop_dt_cache()
+    # Only a refresh whose output we captured counts: failed auth gives None,
+    # Ctrl-C -1 and an unlogged CLI run "". The elevator reports no exit
+    # codes, so catch a failed sync by its output.
+    if (
+        op == "-Sy"
+        and not DRYRUN
+        and isinstance(result, str)
+        and result
+        and "failed to synchronize" not in result
+    ):
+        mark_pacman_synced()
+
 
 # -------- ACTIVATABLE COMMANDS ---------
 
@@ -674,13 +1135,11 @@ def wipe_journal() -> None:
 
 
 def mkinit() -> None:
-    cmd = ["sh", "-c", "mkinitcpio -P"]
+    cmd = ["mkinitcpio", "-P"]
 
     # Detect dracut
-    dracut_path = shutil.which("dracut-rebuild")
-    if dracut_path:
-        cmd.clear()
-        cmd += ["sh", "-c", "dracut-rebuild"]
+    if shutil.which("dracut-rebuild"):
+        cmd = ["dracut-rebuild"]
 
     if c.confirm(
         [
@@ -712,7 +1171,7 @@ def pacman_sync() -> None:
     ):
         if exists:
             runner(
-                ["sh", "-c", f"rm {hook_path!s}"],
+                ["rm", str(hook_path)],
                 True,
                 "Pacman Sync Hook",
                 False,
@@ -737,27 +1196,19 @@ def pacman_sync() -> None:
         return
 
     c.message(
-        ["Pacman Sync Hook " + ("removed" if exists else "installed") + "."],
+        [f"Pacman Sync Hook {'removed' if exists else 'installed'}."],
         "Pacman Sync Hook",
     )
 
 
 def uboot_migrator() -> bool:
-    if (not dt.extlinux_exists()) or dt.booted_with_edk():
+    env = bootenv()
+    if (not env.ext) or env.edk:
         return True  # UEFI system
 
     installed = dt.safe_exists("/usr/bin/u-boot-update")
     if not installed:
-        runner(
-            [
-                "sh",
-                "-c",
-                "pacman -Sy && pacman -S --noconfirm u-boot-update",
-            ],
-            True,
-            "Installing U-Boot Updater",
-            prompt=False,
-        )
+        pacman_install(["u-boot-update"], "Installing U-Boot Updater", prompt=False)
 
     extcfg = dt.parse_uboot()  # Will load defaults if not found
     if extcfg["U_BOOT_IS_SETUP"] == "false":
@@ -786,7 +1237,7 @@ def uboot_migrator() -> bool:
 
         if "append" in label_data:
             params = label_data["append"]
-            extcfg["U_BOOT_PARAMETERS"] = re.sub(r"\s*root=[^\s]+", "", params).strip()
+            extcfg["U_BOOT_PARAMETERS"] = ROOT_PARAM_RE.sub("", params).strip()
 
         if "fdt" in label_data:
             dtb = label_data["fdt"]
@@ -805,21 +1256,11 @@ def uboot_migrator() -> bool:
 
         extcfg = dt.encode_uboot(extcfg)
 
-        if not DRYRUN:
-            elevated_file_write("/etc/default/u-boot", extcfg)
-        else:
-            c.message(
-                [
-                    "The U-Boot config would have been updated with the following:",
-                    "",
-                    extcfg,
-                ],
-                "DRYRUN Simulated Output",
-            )
-
-        runner(
+        update_config(
+            "/etc/default/u-boot",
+            extcfg,
+            "U-Boot",
             ["u-boot-update"],
-            True,
             "Trigger U-Boot Update",
         )
 
@@ -827,70 +1268,123 @@ def uboot_migrator() -> bool:
     return True
 
 
+def dt_table(trees: dict) -> list:
+    # Single pass for both the column widths and the row strings.
+    rows = []
+    maxnl = 0
+    maxde = 11
+    for tree in sorted(trees):
+        v = trees[tree]
+        name = v["name"]
+        desc = v["description"] or ""
+        compat = v["compatible"]
+        rows.append((name, desc, " ".join(compat) if compat else ""))
+        maxnl = max(maxnl, len(name))
+        maxde = max(maxde, len(desc))
+
+    txt = [f'{"NAME".ljust(maxnl)} | {"DESCRIPTION".ljust(maxde)} | COMPATIBLE']
+    for name, desc, compat_str in rows:
+        txt.append(f"{name.ljust(maxnl)} | {desc.ljust(maxde)} | {compat_str}")
+    return txt
+
+
 def gen_dt_report() -> list:
-    dts = dt.gencache()
+    dts = gencache()
     txt = ["Base Device Trees:"]
     if dts["base"]:
-        maxnl = max(len(v["name"]) for v in dts["base"].values())
-        maxde = max(
-            max(
-                len(v["description"] if v["description"] is not None else [])
-                for v in dts["base"].values()
-            ),
-            11,
-        )
-        maxco = max(len(",".join(v["compatible"])) for v in dts["base"].values())
-        txt.append(f'{"NAME".ljust(maxnl)} | {"DESCRIPTION".ljust(maxde)} | COMPATIBLE')
-        for tree in sorted(list(dts["base"].keys())):
-            base = dts["base"][tree]
-            name = base["name"]
-            desc = base["description"] or ""
-
-            compat = base["compatible"]
-            if compat:
-                compat_str = " ".join(compat)
-            else:
-                compat_str = ""
-
-            txt.append(f"{name.ljust(maxnl)} | {desc.ljust(maxde)} | {compat_str}")
+        txt += dt_table(dts["base"])
     else:
         txt.append("No base DTBs detected on the system.")
     txt += ["", "Overlays:"]
     if dts["overlays"]:
-        maxnl = max(len(v["name"]) for v in dts["overlays"].values())
-        maxde = max(
-            max(
-                len(v["description"] if v["description"] is not None else [])
-                for v in dts["overlays"].values()
-            ),
-            11,
-        )
-        maxco = max(len(",".join(v["compatible"])) for v in dts["overlays"].values())
-        txt.append(f'{"NAME".ljust(maxnl)} | {"DESCRIPTION".ljust(maxde)} | COMPATIBLE')
-        for tree in sorted(list(dts["overlays"].keys())):
-            overlay = dts["overlays"][tree]
-            name = overlay["name"]
-            desc = overlay["description"] or ""
-
-            compat = overlay["compatible"]
-            if compat:
-                compat_str = " ".join(compat)
-            else:
-                compat_str = ""
-
-            txt.append(f"{name.ljust(maxnl)} | {desc.ljust(maxde)} | {compat_str}")
+        txt += dt_table(dts["overlays"])
     else:
         txt.append("No overlays detected on the system.")
-    ovs = ["  - " + c for c in dt.identify_overlays()]
+    ovs = [f"  - {i}" for i in enabled_overlays()]
     txt += ["", "Enabled Overlays:"] + ovs
     txt += ["", "Live System Tree:"]
     base, overlays = dt.detect_live()
     txt += [f"Base: {base}", "", "Live Overlay-like entries (diffs):"]
     for line in overlays:
-        txt.append("  + " + line)
+        txt.append(f"  + {line}")
     return txt
 
 
+def dt_choices(trees: dict) -> tuple:
+    # Cache keys, names and selector lines, sorted by key, in one pass.
+    keys = sorted(trees)
+    names = []
+    compats = []
+    maxnl = 0
+    for tree in keys:
+        name = trees[tree]["name"]
+        compat = trees[tree]["compatible"]
+        names.append(name)
+        compats.append(" ".join(compat) if compat else "")
+        maxnl = max(maxnl, len(name))
+
+    lines = [f"{name.ljust(maxnl)} | {compat}" for name, compat in zip(names, compats)]
+    return keys, names, lines
+
+
+def select_base_dtb(dts: dict) -> None:
+    matchdt, names, basedt = dt_choices(dts["base"])
+    preselect = -1
+    live, _ = dt.detect_live()
+    if live:
+        live = tree_name(live)
+
+    for i, name in enumerate(names):
+        if name == live:
+            preselect = i
+
+    res = c.selector(basedt, False, "Select a device Tree", preselect=preselect)
+
+    if res is not None:
+        sel = c.confirm(
+            [
+                "Confirm the following changes:",
+                "",
+                "Base DTB set to:",
+                matchdt[res],
+            ],
+            "Confirm System Changes",
+        )
+
+        if sel:
+            set_base_dtb(matchdt[res])
+
+
+def select_overlays(dts: dict) -> None:
+    if not dts["overlays"]:
+        c.message(["No overlays were detected on the system!"], "Device Tree Manager")
+        return
+
+    matchdt, names, basedt = dt_choices(dts["overlays"])
+    live = {tree_name(i) for i in enabled_overlays()}
+    preselect = [i for i, name in enumerate(names) if name in live]
+
+    res = c.selector(basedt, True, "Select overlays", preselect=preselect)
+
+    if res:
+        dtbos = []
+        for i in res:
+            dtbos.append(matchdt[i])
+
+        res = c.confirm(
+            [
+                "Confirm the following changes:",
+                "",
+                "Overlays set to:",
+            ]
+            + dtbos,
+            "Confirm System Changes",
+        )
+
+        if res:
+            set_overlays(dtbos)
+
+
 def dt_manager(cmd: list = []) -> None:
     c.message(["Please wait..", ""], "Generating Device Tree Caches", False)
 
@@ -898,7 +1392,7 @@ def dt_manager(cmd: list = []) -> None:
     if not migrated:
         return
 
-    dts = dt.gencache()
+    dts = gencache()
     if not dts["base"]:
         c.message(["No Device Trees were detected!"], "Device Tree Manager")
         return
@@ -908,40 +1402,28 @@ def dt_manager(cmd: list = []) -> None:
             print("No operations specified.\n\nUsage: list/base/overlay\n")
         else:
             if cmd[0] == "list":
-                print("\n".join(gen_dt_report()))
+                sys.stdout.write("\n".join(gen_dt_report()) + "\n")
             elif cmd[0] == "base":
                 if len(cmd) > 1:
                     set_base_dtb(cmd[1])
                 else:
                     live, _ = dt.detect_live()
                     if live:
-                        live = str(live)
-                        live = live[live.rfind("/") + 1 : live.rfind(".")]
-                        print(f"Currently booted base DTB: {live}.dtb")
+                        print(f"Currently booted base DTB: {tree_name(live)}.dtb")
             elif cmd[0] == "overlay":
                 if len(cmd) > 1:
-                    if cmd[1] == "enable":
-                        existing = dt.identify_overlays()
-                        dtbos = cmd[2:]
-                        for i in range(len(existing)):
-                            existing[i] = normalize_filename(existing[i], "dtbo")
-                        for i in range(len(dtbos)):
-                            dtbos[i] = normalize_filename(dtbos[i], "dtbo")
-                        for i in dtbos:
-                            if i not in existing:
-                                existing.append(i)
-                        set_overlays(existing)
-                    elif cmd[1] == "disable":
-                        existing = dt.identify_overlays()
-                        dtbos = cmd[2:]
-                        for i in range(len(existing)):
-                            existing[i] = normalize_filename(existing[i], "dtbo")
-                        for i in range(len(dtbos)):
-                            dtbos[i] = normalize_filename(dtbos[i], "dtbo")
-                        for i in dtbos:
-                            if i in existing:
-                                existing.remove(i)
-                        set_overlays(existing)
+                    if cmd[1] in ("enable", "disable"):
+                        # Dict keys as an ordered set, overlay order is kept.
+                        existing = dict.fromkeys(
+                            normalize_filename(i, "dtbo") for i in enabled_overlays()
+                        )
+                        dtbos = [normalize_filename(i, "dtbo") for i in cmd[2:]]
+                        if cmd[1] == "enable":
+                            existing.update(dict.fromkeys(dtbos))
+                        else:
+                            for i in dtbos:
+                                existing.pop(i, None)
+                        set_overlays(list(existing))
                     else:
                         print(
                             "Invalid operation specified.\n\nUsage: enable/disable overlay.dtbo\n"
@@ -954,136 +1436,20 @@ def dt_manager(cmd: list = []) -> None:
                 print("Invalid operation specified.\n\nUsage: list/base/overlay\n")
         return
 
-    options = [
-        "Set the Base Device Tree",
-        "Enable / Disable Overlays",
-        "View Currently Enabled Trees",
-        "Main Menu",
-    ]
-
-    while True:
-        selection = c.draw_menu("Device Tree Manager", options)
-        if selection is None or options[selection] == "Main Menu":
-            return
-
-        c.stdscr.clear()
-        c.stdscr.refresh()
-        if options[selection] == "Set the Base Device Tree":
-            maxnl = max(len(v["name"]) for v in dts["base"].values())
-            maxde = max(
-                len(v["description"] if v["description"] is not None else [])
-                for v in dts["base"].values()
-            )
-            maxco = max(len(",".join(v["compatible"])) for v in dts["base"].values())
-
-            basedt = []
-            matchdt = []
-            preselect = -1
-            live, _ = dt.detect_live()
-            if live:
-                live = str(live)
-                live = live[live.rfind("/") + 1 : live.rfind(".")]
-
-            for tree in sorted(list(dts["base"].keys())):
-                base = dts["base"][tree]
-                name = base["name"]
-
-                compat = base["compatible"]
-                if compat:
-                    compat_str = " ".join(compat)
-                else:
-                    compat_str = ""
-
-                basedt.append(f"{name.ljust(maxnl)} | {compat_str}")
-                if name == live:
-                    preselect = len(matchdt)
-                matchdt.append(tree)
-
-            res = c.selector(basedt, False, "Select a device Tree", preselect=preselect)
-
-            if res is not None:
-                sel = c.confirm(
-                    [
-                        "Confirm the following changes:",
-                        "",
-                        "Base DTB set to:",
-                        matchdt[res],
-                    ],
-                    "Confirm System Changes",
-                )
-
-                if sel:
-                    set_base_dtb(matchdt[res])
-
-        if options[selection] == "Enable / Disable Overlays":
-            if not dts["overlays"]:
-                c.message(
-                    ["No overlays were detected on the system!"], "Device Tree Manager"
-                )
-                continue
-
-            maxnl = max(len(v["name"]) for v in dts["overlays"].values())
-            maxde = max(
-                len(v["description"] if v["description"] is not None else [])
-                for v in dts["overlays"].values()
-            )
-            maxco = max(
-                len(",".join(v["compatible"])) for v in dts["overlays"].values()
-            )
-
-            basedt = []
-            matchdt = []
-            live = dt.identify_overlays()
-            preselect = []
-
-            for i in range(len(live)):
-                live[i] = str(live[i])
-                live[i] = live[i][live[i].rfind("/") + 1 : live[i].rfind(".")]
-
-            for tree in sorted(list(dts["overlays"].keys())):
-                base = dts["overlays"][tree]
-                name = base["name"]
-                desc = base["description"] or ""
-
-                compat = base["compatible"]
-                if compat:
-                    compat_str = " ".join(compat)
-                else:
-                    compat_str = ""
-
-                basedt.append(f"{name.ljust(maxnl)} | {compat_str}")
-                if name in live:
-                    preselect.append(len(matchdt))
-                matchdt.append(tree)
-
-            res = c.selector(basedt, True, "Select overlays", preselect=preselect)
-
-            if res:
-                dtbos = []
-                for i in res:
-                    dtbos.append(matchdt[i])
-
-                res = c.confirm(
-                    [
-                        "Confirm the following changes:",
-                        "",
-                        "Overlays set to:",
-                    ]
-                    + dtbos,
-                    "Confirm System Changes",
-                )
-
-                if res:
-                    set_overlays(dtbos)
-
-        if options[selection] == "View Currently Enabled Trees":
-            c.message(gen_dt_report(), "Overlay Information")
+    c.menu(
+        "Device Tree Manager",
+        {
+            "Set the Base Device Tree": lambda: select_base_dtb(dts),
+            "Enable / Disable Overlays": lambda: select_overlays(dts),
+            "View Currently Enabled Trees": lambda: c.message(
+                gen_dt_report(), "Overlay Information"
+            ),
+        },
+    )
 
 
-def hack_pipewire() -> None:
-    res = False
-    service_path = Path.home() / ".config/systemd/user/pipewire.service"
-    service_content = """[Unit]
+PIPEWIRE_UNIT_PATH = Path.home() / ".config/systemd/user/pipewire.service"
+PIPEWIRE_UNIT = """[Unit]
 Description=PipeWire Multimedia Service
 
 # We require pipewire.socket to be active before starting the daemon, because
@@ -1119,22 +1485,25 @@ Also=pipewire.socket
 WantedBy=default.target
 """
 
-    if service_path.exists():
+
+def hack_pipewire() -> None:
+    res = False
+    if PIPEWIRE_UNIT_PATH.exists():
         if c.confirm(["Remove the hack?"], "Pipewire CPU Fix") and not DRYRUN:
-            service_path.unlink()
+            PIPEWIRE_UNIT_PATH.unlink()
         else:
             return
     else:
         if c.confirm(["Apply the hack?"], "Pipewire CPU Fix") and not DRYRUN:
-            service_path.parent.mkdir(parents=True, exist_ok=True)
-            service_path.write_text(service_content)
+            PIPEWIRE_UNIT_PATH.parent.mkdir(parents=True, exist_ok=True)
+            PIPEWIRE_UNIT_PATH.write_text(PIPEWIRE_UNIT)
         else:
             return
         res = True
 
     c.message(
         [
-            "Pipewire CPU Fix " + ("applied" if res else "removed") + ".",
+            f"Pipewire CPU Fix {'applied' if res else 'removed'}.",
             "Relog or Reboot to apply.",
         ],
         "Pipewire CPU Fix",
@@ -1142,27 +1511,20 @@ WantedBy=default.target
 
 
 def hack_wol() -> None:
-    cmd = [
-        "bash",
-        "-c",
-        'pacman -Qi bredos-wol &>/dev/null && echo "Removing.." && pacman -R --noconfirm bredos-wol || { echo "Installing.."; pacman -Sy; pacman -S --noconfirm bredos-wol; }',
-    ]
     if c.confirm(["Toggle the Wake-On-Lan hack?"], "Wake On Lan"):
-        runner(cmd, True, "Wake On Lan")
+        installed = not subprocess.run(
+            ["pacman", "-Qi", "bredos-wol"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ).returncode
+        if installed:
+            runner(["pacman", "-R", "--noconfirm", "bredos-wol"], True, "Wake On Lan")
+        else:
+            pacman_install(["bredos-wol"], "Wake On Lan")
 
 
 def hack_gpgme() -> None:
-    cmd = [
-        "bash",
-        "-c",
-        "if [[ -L /usr/lib/libgpgme.so.11 ]]; then "
-        + 'echo "Removing symlink.."; rm /usr/lib/libgpgme.so.11; '
-        + "elif [[ -e /usr/lib/libgpgme.so.11 ]]; then "
-        + 'echo "File exists and is not a symlink. Doing nothing."; '
-        + "else "
-        + 'echo "Creating symlink.."; ln -s /usr/lib/libgpgme.so /usr/lib/libgpgme.so.11; '
-        + "fi",
-    ]
+    link = Path("/usr/lib/libgpgme.so.11")
     if c.confirm(
         [
             "This hack applies / removes a gnupg fix to counter ALARM's stupidity.",
@@ -1170,109 +1532,115 @@ def hack_gpgme() -> None:
         ],
         "ALARM IS STUPID",
     ):
-        runner(cmd, True, "ALARM IS STUPID")
+        if link.is_symlink():
+            runner(["rm", "-v", str(link)], True, "ALARM IS STUPID")
+        elif link.exists():
+            c.message(
+                ["File exists and is not a symlink. Doing nothing."], "ALARM IS STUPID"
+            )
+        else:
+            runner(
+                ["ln", "-sv", "/usr/lib/libgpgme.so", str(link)],
+                True,
+                "ALARM IS STUPID",
+            )
+
+
+INTEGRITY_ISSUE_RE = re.compile(r":.*(missing|Size mismatch|MODIFIED)")
+INTEGRITY_SKIP_RE = re.compile(
+    r"\.json|\.conf|\.pac(new|save|orig)"
+    r"|/\.?(bashrc|bash_profile|zshrc|profile)$"
+    r"|/etc/(shells|subgid|subuid|environment|sudoers|passwd|shadow|group|gshadow|fstab|mtab|issue|default/|skel/|locale\.gen|ssh/|libvirt/|pacman\.d/mirrorlist)"
+    r"|/usr/share/(doc|man)|\.cache"
+)
 
 
 def pacman_integrity() -> None:
-    cmd = [
-        "sh",
-        "-c",
-        r"""echo "Running.." && pacman -Qkk 2>/dev/null | awk '
-/:.*(missing|Size mismatch|MODIFIED)/ &&
-$0 !~ /\.json|\.conf|\.pac(new|save|orig)/ &&
-$0 !~ /\/\.?(bashrc|bash_profile|zshrc|profile)$/ &&
-$0 !~ /^.*\/etc\/(shells|subgid|subuid|environment|sudoers|passwd|shadow|group|gshadow|fstab|mtab|issue|default\/|skel\/|locale\.gen|ssh\/|libvirt\/|pacman\.d\/mirrorlist)/ &&
-$0 !~ /\/usr\/share\/(doc|man)|\.cache/ {
-    pkg = gensub(/:.*$/, "", 1, $0);
-    issues[pkg]++;
-    print;
-    found = 1;
-}
-END {
-    if (found) {
-        print "\n==== Summary ====";
-        for (p in issues) print p ": " issues[p] " issue(s)";
-    } else {
-        print "+++ No integrity issues found. +++";
-    }
-}
-'""",
-    ]
-    runner(cmd, False, "Check Packages Integrity")
+    cmd = ["pacman", "-Qkk"]
+    label = "Check Packages Integrity"
+    if DRYRUN:
+        runner(cmd, False, label)
+        return
+
+    found = []
+    issues = {}
+
+    def matches(batches):
+        # Only pass issues on, so the TUI shows them as pacman finds them.
+        for batch in batches:
+            hits = []
+            for line in batch:
+                if INTEGRITY_ISSUE_RE.search(line) and not INTEGRITY_SKIP_RE.search(
+                    line
+                ):
+                    hits.append(line)
+                    found.append(line.rstrip("\n"))
+                    pkg = line.split(":", 1)[0]
+                    issues[pkg] = issues.get(pkg, 0) + 1
+            yield hits
+
+    if c.stdscr is None:
+        c.message(["Running.."], label, False)
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    ) as proc:
+        try:
+            hits = matches(pipe_lines(proc.stdout.fileno()))
+            if c.stdscr is None:
+                for batch in hits:
+                    if batch:
+                        sys.stdout.write("".join(batch))
+                        sys.stdout.flush()
+            else:
+                cmdr_tui(proc, hits, label)
+            proc.wait()
+        except KeyboardInterrupt:
+            try:
+                proc.kill()
+            except:
+                pass
+            c.message(["ABORTED"], label)
+            return
+
+    if found:
+        report = found + ["", "==== Summary ===="]
+        report += [f"{pkg}: {count} issue(s)" for pkg, count in issues.items()]
+    else:
+        report = ["+++ No integrity issues found. +++"]
+
+    log_command(cmd, "\n".join(report))
+    if c.stdscr is None and found:
+        # The issues themselves were already printed as they were found.
+        report = report[len(found) :]
+    c.message(report, label)
 
 
 def install_recommends() -> None:
-    cmd = [
-        "sh",
-        "-c",
-        "pacman -Sy && pacman -S --noconfirm --needed"
-        + " legcord-bin"
-        + " ayugram-desktop"
-        + " thunderbird"
-        + " gnome-disk-utility"
-        + " mpv"
-        + " libreoffice-fresh"
-        + " timeshift"
-        + " proton-run"
-        + " evince"
-        + " loupe",
-    ]
-    if c.confirm(
-        [
-            "This will install the following packages:",
-            "",
-            " - legcord-bin",
-            " - ayugram-desktop",
-            " - thunderbird",
-            " - gnome-disk-utility",
-            " - mpv",
-            " - libreoffice-fresh",
-            " - timeshift",
-            " - proton-run",
-            " - evince",
-            " - loupe",
-            "",
-            "Are you sure you wish to continue?",
-        ],
-        "Install Recommended Packages",
-    ):
-        runner(cmd, True, "Install Recommended Packages")
+    if confirm_install(RECOMMENDS_PKGS, "Install Recommended Packages"):
+        pacman_install(RECOMMENDS_PKGS, "Install Recommended Packages")
 
 
 def install_docker() -> None:
-    cmd = [
-        "sh",
-        "-c",
-        "pacman -Sy && pacman -S --noconfirm --needed"
-        + " docker"
-        + " docker-buildx"
-        + " docker-compose"
-        + " pigz"
-        + " criu"
-        + " && systemctl disable --now systemd-networkd-wait-online"
-        + " && systemctl mask systemd-networkd-wait-online"
-        + " && systemctl enable --now docker",
-    ]
-    if c.confirm(
-        [
-            "This will install AND ENABLE the following packages:",
-            "",
-            " - docker",
-            " - docker-buildx",
-            " - docker-compose",
-            " - pigz",
-            " - criu",
-            "",
-            "Are you sure you wish to continue?",
-        ],
+    if confirm_install(
+        DOCKER_PKGS,
         "Install Docker",
+        "This will install AND ENABLE the following packages:",
     ):
-        runner(cmd, True, "Install Docker")
+        pacman_install(DOCKER_PKGS, "Install Docker", DOCKER_POST)
+
+
+# The CPU cannot change under us, probe it at most once.
+@functools.lru_cache(maxsize=None)
+def arm64_v9() -> bool:
+    return utilities.arm64_v9_or_later()
 
 
 def install_steam() -> None:
-    if os.uname().machine == "aarch64":
-        if utilities.arm64_v9_or_later():
+    if ARCH == "aarch64":
+        if arm64_v9():
             c.message(
                 [
                     "Steam on ARMv9 systems is temporarily not supported.",
@@ -1281,12 +1649,7 @@ def install_steam() -> None:
                 ],
                 "Cannot Install Steam",
             )
-        elif "rockchip-rk3588-panthor-gpu.dtbo" in dt.identify_overlays():
-            cmd = [
-                "sh",
-                "-c",
-                "pacman -Sy && pacman -S --noconfirm --needed steam steam-libs-any",
-            ]
+        elif "rockchip-rk3588-panthor-gpu.dtbo" in enabled_overlays():
             if c.confirm(
                 [
                     "This will install Steam for ARM, for mainline mesa systems.",
@@ -1295,13 +1658,8 @@ def install_steam() -> None:
                     "Are you sure you wish to continue?",
                 ]
             ):
-                runner(cmd, True, "Install Steam")
+                pacman_install(["steam", "steam-libs-any"], "Install Steam")
         else:
-            cmd = [
-                "sh",
-                "-c",
-                "pacman -Sy && pacman -S --noconfirm --needed steam steam-libs-rk3588",
-            ]
             if c.confirm(
                 [
                     "This will install Steam for ARM, suitable for RK3588 systems with Panfork graphics.",
@@ -1310,13 +1668,8 @@ def install_steam() -> None:
                     "Are you sure you wish to continue?",
                 ]
             ):
-                runner(cmd, True, "Install Steam")
+                pacman_install(["steam", "steam-libs-rk3588"], "Install Steam")
     else:
-        cmd = [
-            "sh",
-            "-c",
-            "pacman -Sy && pacman -S --noconfirm --needed steam",
-        ]
         if c.confirm(
             [
                 "This will install normal Steam, this will not work on non-x86 systems.",
@@ -1324,140 +1677,22 @@ def install_steam() -> None:
                 "Are you sure you wish to continue?",
             ]
         ):
-            runner(cmd, True, "Install Steam")
+            pacman_install(["steam"], "Install Steam")
 
 
 def install_development() -> None:
-    cmd = [
-        "sh",
-        "-c",
-        "pacman -Sy && pacman -S --noconfirm --needed"
-        + " python-prettytable"
-        + " grub"
-        + " parted"
-        + " gptfdisk"
-        + " edk2-rk3588-devel"
-        + " dtc"
-        + " xmlto"
-        + " docbook-xsl"
-        + " kmod"
-        + " bc"
-        + " uboot-tools"
-        + " bredos-tools",
-    ]
-    if c.confirm(
-        [
-            "This will install the following packages:",
-            "",
-            " - python-prettytable",
-            " - grub",
-            " - parted",
-            " - gptfdisk",
-            " - edk2-rk3588-devel",
-            " - dtc",
-            " - xmlto",
-            " - docbook-xsl",
-            " - kmod",
-            " - bc",
-            " - uboot-tools",
-            " - bredos-tools",
-            "",
-            "Are you sure you wish to continue?",
-        ],
-        "Install BredOS Development Packages",
-    ):
-        runner(cmd, True, "Install BredOS Development Packages")
+    if confirm_install(DEVELOPMENT_PKGS, "Install BredOS Development Packages"):
+        pacman_install(DEVELOPMENT_PKGS, "Install BredOS Development Packages")
 
 
 def install_gnome() -> None:
-    cmd = [
-        "sh",
-        "-c",
-        "pacman -Sy && pacman -S --noconfirm --needed"
-        + " gnome-app-list"
-        + " gnome-autoar"
-        + " gnome-backgrounds"
-        + " gnome-bluetooth-3.0"
-        + " gnome-calculator"
-        + " gnome-characters"
-        + " gnome-clocks"
-        + " gnome-color-manager"
-        + " gnome-control-center"
-        + " gnome-desktop"
-        + " gnome-desktop-4"
-        + " gnome-desktop-common"
-        + " gnome-disk-utility"
-        + " gnome-keybindings"
-        + " gnome-keyring"
-        + " gnome-menus"
-        + " gnome-online-accounts"
-        + " gnome-power-manager"
-        + " gnome-session"
-        + " gnome-settings-daemon"
-        + " gnome-shell"
-        + " gnome-shell-extensions"
-        + " gnome-system-monitor"
-        + " gnome-themes-extra"
-        + " gnome-tweaks"
-        + " gnome-user-share"
-        + " gnome-weather"
-        + " polkit-gnome"
-        + " xdg-desktop-portal-gnome"
-        + " extension-manager"
-        + " evince"
-        + " caribou"
-        + " nautilus"
-        + " nautilus-python"
-        + " libnautilus-extension"
-        + " gdm",
-    ]
-    if c.confirm(
-        [
-            "This will install the following packages:",
-            "",
-            " - gnome-app-list",
-            " - gnome-autoar",
-            " - gnome-backgrounds",
-            " - gnome-bluetooth-3.0",
-            " - gnome-calculator",
-            " - gnome-characters",
-            " - gnome-clocks",
-            " - gnome-color-manager",
-            " - gnome-control-center",
-            " - gnome-desktop",
-            " - gnome-desktop-4",
-            " - gnome-desktop-common",
-            " - gnome-disk-utility",
-            " - gnome-keybindings",
-            " - gnome-keyring",
-            " - gnome-menus",
-            " - gnome-online-accounts",
-            " - gnome-power-manager",
-            " - gnome-session",
-            " - gnome-settings-daemon",
-            " - gnome-shell",
-            " - gnome-shell-extensions",
-            " - gnome-system-monitor",
-            " - gnome-themes-extra",
-            " - gnome-tweaks",
-            " - gnome-user-share",
-            " - gnome-weather",
-            " - polkit-gnome",
-            " - xdg-desktop-portal-gnome",
-            " - extension-manager",
-            " - evince",
-            " - caribou",
-            " - nautilus",
-            " - nautilus-python",
-            " - libnautilus-extension",
-            " - gdm",
-            "",
-            "Are you sure you wish to continue?",
-        ],
-        "Install GNOME Desktop",
-    ):
-        runner(cmd, True, "Install GNOME Desktop")
+    if confirm_install(GNOME_PKGS, "Install GNOME Desktop"):
+        pacman_install(GNOME_PKGS, "Install GNOME Desktop")
 
+    enable_gdm()
+
+
+def enable_gdm() -> None:
     if c.confirm(
         [
             "Enable the Gnome Display Manager (GDM)?",
@@ -1468,22 +1703,16 @@ def install_gnome() -> None:
     ):
         symlink_path = Path("/etc/systemd/system/display-manager.service")
 
-        dewit = False
+        # Nothing to run when GDM is already the display manager.
+        cmds = [["systemctl", "enable", "gdm.service"]]
         if symlink_path.is_symlink():
-            current_target = symlink_path.resolve().name
-            if current_target != "gdm.service":
-                runner(
-                    ["systemctl", "disable", current_target],
-                    True,
-                    "Disable existing Display Manager",
-                    False,
-                )
-                dewit = True
-        else:
-            dewit = True
+            current_target = symlink_path.readlink().name
+            if current_target == "gdm.service":
+                cmds = []
+            else:
+                cmds.insert(0, ["systemctl", "disable", current_target])
 
-        if dewit:
-            runner(["systemctl", "enable", "gdm.service"], True, "Enable GDM", False)
+        mrunner(cmds, True, "Enable GDM", False)
 
         c.message(
             [
@@ -1495,23 +1724,36 @@ def install_gnome() -> None:
         )
 
 
-def unlock_pacman() -> None:
-    cmd = [
-        "bash",
-        "-c",
-        '[ -f /var/lib/pacman/db.lck ] && ! pgrep -x pacman >/dev/null && { sudo rm -f /var/lib/pacman/db.lck && echo "Pacman DB lock removed."; } || echo "No action needed."',
+def install_multiple() -> None:
+    sets = [
+        ("Recommended Desktop Packages", RECOMMENDS_PKGS, ()),
+        ("Docker", DOCKER_PKGS, DOCKER_POST),
+        ("BredOS Development Packages", DEVELOPMENT_PKGS, ()),
+        ("GNOME Desktop", GNOME_PKGS, ()),
     ]
-    elevate = True
-    runner(cmd, True, "Unlock Pacman Database")
+
+    res = c.selector([i[0] for i in sets], True, "Select package sets")
+    if not res:
+        return
+
+    # One transaction, one dependency resolution and one round of hooks.
+    pkgs = list(dict.fromkeys(pkg for i in res for pkg in sets[i][1]))
+    post = [step for i in res for step in sets[i][2]]
+
+    if confirm_install(pkgs, "Install Multiple Package Sets"):
+        pacman_install(pkgs, "Install Multiple Package Sets", post)
+        if GNOME_PKGS in (sets[i][1] for i in res):
+            enable_gdm()
+
+
+def unlock_pacman() -> None:
+    if not os.path.exists(PACMAN_LOCK) or pacman_running():
+        c.message(["No action needed."], "Unlock Pacman Database")
+        return
+    runner(["rm", "-fv", PACMAN_LOCK], True, "Unlock Pacman Database")
 
 
 def autoremove() -> None:
-    cmd = [
-        "bash",
-        "-c",
-        "while pacman -Qdtq >/dev/null 2>&1; do sudo pacman -Rns --noconfirm $(pacman -Qdtq); done",
-    ]
-    elevate = True
     if c.confirm(
         [
             "This will REMOVE ALL PACKAGES that aren't:",
@@ -1523,7 +1765,22 @@ def autoremove() -> None:
         ],
         "Remove Unused Packages",
     ):
-        runner(cmd, True, "Remove Unused Packages")
+        # -Qdtq exits non-zero when there is nothing to list.
+        orphans = subprocess.run(
+            ["pacman", "-Qdtq"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).stdout.split()
+        if not orphans:
+            c.message(["No unused packages found."], "Remove Unused Packages")
+            return
+        runner(
+            ["pacman", "-Rns", "--noconfirm", *orphans],
+            True,
+            "Remove Unused Packages",
+        )
 
 
 def repos_stable() -> None:
@@ -1648,6 +1905,7 @@ def packages_menu() -> None:
             "Install Steam": install_steam,
             "Install BredOS Development Packages": install_development,
             "Install GNOME Desktop": install_gnome,
+            "Install Multiple Package Sets": install_multiple,
             "Unlock Pacman Database": unlock_pacman,
             "Autoremove Unused packages": autoremove,
             "Check Packages Integrity": pacman_integrity,
@@ -1705,63 +1963,61 @@ def tui():
 # -------------- CLI LOGIC --------------
 
 
-def dp(args):
-    cmd = args.command
+CLI_ACTIONS = {
+    ("updater", None, None): updater,
+    ("upkeep", "maintenance", None): filesystem_maint,
+    ("upkeep", "check", None): filesystem_check,
+    ("upkeep", "expand", None): filesystem_resize,
+    ("upkeep", "journal", None): wipe_journal,
+    ("upkeep", "initcpio", None): mkinit,
+    ("tweaks", "pipewire", None): hack_pipewire,
+    ("tweaks", "wol", None): hack_wol,
+    ("tweaks", "pacmansync", None): pacman_sync,
+    ("tweaks", "gpgme", None): hack_gpgme,
+    ("migrations", "cpio", None): migrate_cpio,
+    ("packages", "install", "recommends"): install_recommends,
+    ("packages", "install", "docker"): install_docker,
+    ("packages", "install", "steam"): install_steam,
+    ("packages", "install", "development"): install_development,
+    ("packages", "install", "gnome"): install_gnome,
+    ("packages", "unlock", None): unlock_pacman,
+    ("packages", "autoremove", None): autoremove,
+    ("packages", "integrity", None): pacman_integrity,
+    ("repos", "stable", None): repos_stable,
+    ("repos", "latest", None): repos_latest,
+    # ("debug", None, None): debug_info,
+}
+
+
+def cli_tree() -> dict:
+    # command -> action -> targets, as accepted on the command line.
+    tree = {"dt": {}}
+    for command, action, target in CLI_ACTIONS:
+        actions = tree.setdefault(command, {})
+        if action is not None:
+            targets = actions.setdefault(action, [])
+            if target is not None:
+                targets.append(target)
+    tree["info"] = {}
+    return tree
 
-    if cmd == "dt":
+
+def dp(args):
+    if args.command == "dt":
         dt_manager(cmd=args.cmd)
-    elif cmd == "updater":
-        updater()
-    elif cmd == "upkeep":
-        if args.action == "maintenance":
-            filesystem_maint()
-        elif args.action == "check":
-            filesystem_check()
-        elif args.action == "expand":
-            filesystem_resize()
-        elif args.action == "journal":
-            wipe_journal()
-        elif args.action == "initcpio":
-            mkinit()
-    elif cmd == "tweaks":
-        if args.action == "pipewire":
-            hack_pipewire()
-        elif args.action == "wol":
-            hack_wol()
-        elif args.action == "pacmansync":
-            pacman_sync()
-        elif args.action == "gpgme":
-            hack_gpgme()
-    elif cmd == "migrations":
-        if args.action == "cpio":
-            migrate_cpio()
-    elif cmd == "packages":
-        if args.action == "install":
-            if args.target == "recommends":
-                install_recommends()
-            elif args.target == "docker":
-                install_docker()
-            elif args.target == "steam":
-                install_steam()
-            elif args.target == "development":
-                install_development()
-            elif args.target == "gnome":
-                install_gnome()
-        elif args.action == "unlock":
-            unlock_pacman()
-        elif args.action == "autoremove":
-            autoremove()
-        elif args.action == "integrity":
-            pacman_integrity()
-    elif cmd == "repos":
-        if args.action == "stable":
-            repos_stable()
-        elif args.action == "latest":
-            repos_latest()
-    # elif cmd == "debug":
-    #     debug_info()
-    else:
+        return
+
+    action = CLI_ACTIONS.get(
+        (
+            args.command,
+            getattr(args, "action", None),
+            getattr(args, "target", None),
+        )
+    )
+    if action is None:
         print("Unknown command")
+        return
+    action()
 
 
 # ----------------- MISC ------------------
@@ -1776,6 +2032,15 @@ def check_root() -> bool:
 
 def main():
     global LOG_FILE, NOCONFIRM, DRYRUN, ROOT_MODE
+
+    # Plain interactive launch, no need to build the whole parser.
+    if len(sys.argv) == 1:
+        ROOT_MODE = check_root()
+        tui()
+        return
+
+    import argparse
+
     parser = argparse.ArgumentParser(prog="bredos-config", description=c.APP_NAME)
     parser.add_argument(
         "--log",
@@ -1799,81 +2064,43 @@ def main():
     )
     subparsers = parser.add_subparsers(dest="command")
 
-    dt_parser = subparsers.add_parser("dt")
-    dt_sub = dt_parser.add_argument("cmd", nargs=argparse.REMAINDER)
-
-    updater_parser = subparsers.add_parser("updater")
-
-    upkeep_parser = subparsers.add_parser("upkeep")
-    upkeep_sub = upkeep_parser.add_subparsers(dest="action")
-    upkeep_sub.add_parser("maintenance")
-    upkeep_sub.add_parser("check")
-    upkeep_sub.add_parser("expand")
-    upkeep_sub.add_parser("journal")
-    upkeep_sub.add_parser("initcpio")
-
-    # Hacks
-    hack_parser = subparsers.add_parser("tweaks")
-    hack_sub = hack_parser.add_subparsers(dest="action")
-    hack_sub.add_parser("pipewire")
-    hack_sub.add_parser("wol")
-    hack_sub.add_parser("gpgme")
-    hack_sub.add_parser("pacmansync")
-
-    # Migrations
-    migrations_parser = subparsers.add_parser("migrations")
-    migrations_sub = migrations_parser.add_subparsers(dest="action")
-    migrations_sub.add_parser("cpio")
-
-    # Packages
-    pac_parser = subparsers.add_parser("packages")
-    pac_sub = pac_parser.add_subparsers(dest="action", required=True)
-
-    # install sub-subcommands
-    install_parser = pac_sub.add_parser("install")
-    install_sub = install_parser.add_subparsers(dest="target", required=True)
-    install_sub.add_parser("recommends")
-    install_sub.add_parser("docker")
-    install_sub.add_parser("steam")
-    install_sub.add_parser("development")
-    install_sub.add_parser("gnome")
-    install_sub.add_parser("unlock")
-
-    # Packages other actions
-    pac_sub.add_parser("integrity")
-    pac_sub.add_parser("unlock")
-    pac_sub.add_parser("autoremove")
-
-    # Info
-    subparsers.add_parser("info")
-
-    # Repos
-    repos_parser = subparsers.add_parser("repos")
-    repos_sub = repos_parser.add_subparsers(dest="action", required=True)
-    repos_sub.add_parser("stable")
-    repos_sub.add_parser("latest")
-
-    # Debug
-    # subparsers.add_parser("debug")
+    # Every command needs a name for --help, but only the one being run
+    # needs its action and target parsers.
+    requested = next((i for i in sys.argv[1:] if not i.startswith("-")), None)
+    cmd_parser = None
+    action_parsers = {}
+    tree = cli_tree()
+    for command, actions in tree.items():
+        sub = subparsers.add_parser(command)
+        if command == "dt":
+            sub.add_argument("cmd", nargs=argparse.REMAINDER)
+        if command != requested or not actions:
+            continue
+
+        cmd_parser = sub
+        action_sub = sub.add_subparsers(dest="action")
+        for action, targets in actions.items():
+            action_parsers[action] = action_sub.add_parser(action)
+            if targets:
+                target_sub = action_parsers[action].add_subparsers(dest="target")
+                for target in targets:
+                    target_sub.add_parser(target)
 
     args = parser.parse_args()
 
-    if args.command == "upkeep" and args.action is None:
-        upkeep_parser.print_help()
+    action = getattr(args, "action", None)
+    if cmd_parser is not None and action is None:
+        cmd_parser.print_help()
         sys.exit(1)
 
-    if args.command == "tweaks" and args.action is None:
-        hack_parser.print_help()
-        sys.exit(1)
-
-    if args.command == "migrations" and args.action is None:
-        migrations_parser.print_help()
-        sys.exit(1)
+    if action in action_parsers and getattr(args, "target", None) is None:
+        if tree[args.command][action]:
+            action_parsers[action].print_help()
+            sys.exit(1)
 
     # Save command log
     if args.log:
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        LOG_FILE = f"bredos-config-{timestamp}.txt"
+        LOG_FILE = f"bredos-config-{time.strftime('%Y%m%d-%H%M%S')}.txt"
 
     if args.noconfirm:
         c.NOCONFIRM = True